@@ -0,0 +1,158 @@
+from parsers import Parser
+import dimensions
+from time import time
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+"""
+Benchmarks for the parsers, run on synthetic raw results shaped like the 
+output of Scraper.join_data. 
+
+Usage: python benchmarks.py [n_rows] [max_jobs]
+"""
+
+def make_results_df(n_rows, seed=0):
+    """
+    Make a synthetic raw results dataframe.
+
+    Games, cities and sports are drawn from the dimension tables in Data/,
+    and the infobox fields use the same text format as the athlete pages.
+
+    :param n_rows: Number of athlete-result rows
+    :param seed: Random seed (defaults to 0)
+    :return: Dataframe with the columns produced by Scraper.join_data
+    """
+
+    rng = np.random.default_rng(seed)
+    tables = dimensions.load()
+    games = tables['hostcity']
+    sports = tables['sports']
+    nocs = tables['noc']
+    places = ['Oslo, Oslo (NOR)', 'Paris, Île-de-France (FRA)', 'Chicago, Illinois (USA)',
+              'Melbourne, Victoria (AUS)', 'Berlin, Berlin (GER)']
+    months = ['January', 'March', 'May', 'July', 'September', 'November']
+
+    g = rng.integers(0, games.shape[0], n_rows)
+    s = rng.integers(0, sports.shape[0], n_rows)
+    n = rng.integers(0, nocs.shape[0], n_rows)
+    years = rng.integers(1860, 2000, n_rows)
+    died = rng.random(n_rows) < 0.3
+    medal = rng.choice(['', '', '', '', 'Gold', 'Silver', 'Bronze'], n_rows)
+    height = rng.integers(150, 210, n_rows).astype(float)
+    height[rng.random(n_rows) < 0.2] = np.nan
+
+    return pd.DataFrame({
+        'Games': games.Year.astype(str).values[g] + ' ' + games.Season.values[g],
+        'Age': rng.integers(15, 45, n_rows).astype(str),
+        'City': games.City.values[g],
+        'Sport': sports.Sport.values[s],
+        'Event': sports.Sport.values[s] + " Men's Event",
+        'Team': nocs.region1.values[n],
+        'NOC': nocs.NOC.values[n],
+        'Rank': rng.integers(1, 30, n_rows).astype(str),
+        'Medal': medal,
+        'id': rng.integers(1, 150000, n_rows),
+        'name': 'Athlete Name',
+        'gender': rng.choice(['Male', 'Female'], n_rows),
+        'height': height,
+        'weight': [f'{w} lbs ({round(w / 2.2)} kg)' for w in rng.integers(100, 250, n_rows)],
+        'birth': [f'{months[i % 6]} {i % 28 + 1}, {y} in {places[i % 5]}' 
+                  for i, y in enumerate(years)],
+        'death': [f'{months[i % 6]} {i % 28 + 1}, {y + 70} in {places[(i + 2) % 5]}' if d else '' 
+                  for i, (y, d) in enumerate(zip(years, died))],
+        'affiliations': '',
+        'relatives': '',
+        'link': [f'https://www.sports-reference.com/olympics/athletes/xx/athlete-{i}.html' 
+                 for i in range(n_rows)]
+        })
+
+
+def bench_parser_scaling(df, max_jobs=None, chunks_per_job=4):
+    """
+    Time Parser.parse_results_df on df for 1, 2, 4, ... up to max_jobs processes.
+
+    The chunk size is set so each process gets chunks_per_job chunks: enough to
+    even out the load, but few enough that each chunk is large compared with
+    the cost of starting a worker and sending it the chunk.
+
+    :param df: Raw results dataframe
+    :param max_jobs: Maximum number of processes (defaults to all cores)
+    :param chunks_per_job: Chunks per process (defaults to 4)
+    :return: Dataframe with the time and speedup for each number of processes
+    """
+
+    if max_jobs is None:
+        max_jobs = os.cpu_count()
+    jobs = [1]
+    while jobs[-1] * 2 < max_jobs:
+        jobs.append(jobs[-1] * 2)
+    if jobs[-1] != max_jobs:
+        jobs.append(max_jobs)
+
+    times = []
+    for n_jobs in jobs:
+        parser = Parser(results_df=df.copy())
+        start = time()
+        chunk_size = -(-df.shape[0] // (n_jobs * chunks_per_job))
+        parser.parse_results_df(n_jobs=n_jobs, chunk_size=chunk_size)
+        times.append(time() - start)
+
+    curve = pd.DataFrame({'n_jobs': jobs, 'seconds': times})
+    curve['speedup'] = curve.seconds[0] / curve.seconds
+    return curve
+
+
+
+def bench_schema(parsed, n_rows=270000, repeats=5):
+    """
+    Compare memory use and groupby speed of the parsed results with and 
+    without results_schema.
+
+    The parsed rows are repeated up to n_rows (about the size of the full 
+    history). The frame without the schema is the same data as plain Python 
+    objects, which is what the parser produced before the schema was added.
+
+    :param parsed: Parsed results dataframe (from Parser.parse_results_df)
+    :param n_rows: Number of rows to benchmark on (defaults to 270000)
+    :param repeats: Number of times each groupby is run (defaults to 5)
+    :return: Dataframe with memory (MB) and groupby times (seconds) for each frame
+    """
+
+    after = pd.concat([parsed] * -(-n_rows // parsed.shape[0]), ignore_index=True).iloc[:n_rows]
+    before = after.astype(object).where(after.notna(), None)
+    before['Weight'] = before.Weight.astype(float)
+
+    groupbys = {
+        'medals by NOC and Games': lambda df: df.groupby(['NOC', 'Year', 'Season', 'Medal'], observed=True).size(),
+        'mean age by sport and sex': lambda df: df.groupby(['Sport', 'Sex'], observed=True).Age.agg(lambda x: x.dropna().astype(float).mean()),
+        'athletes by event': lambda df: df.groupby('Event', observed=True).ID.nunique()
+        }
+
+    rows = []
+    for label, df in [('object', before), ('schema', after)]:
+        row = {'frame': label, 'memory_mb': df.memory_usage(deep=True).sum() / 1e6}
+        for name, f in groupbys.items():
+            start = time()
+            for _ in range(repeats):
+                f(df)
+            row[name] = (time() - start) / repeats
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('frame').T
+
+
+if __name__ == '__main__':
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    df = make_results_df(n_rows)
+
+    print(f'Parser scaling curve ({n_rows} rows, {os.cpu_count()} cores available):')
+    print(bench_parser_scaling(df, max_jobs).round(2).to_string(index=False))
+
+    parser = Parser(results_df=df)
+    parser.parse_results_df()
+    print('Memory (MB) and groupby time (seconds) with and without the output schema:')
+    print(bench_schema(parser.parsed_results).round(3).to_string())
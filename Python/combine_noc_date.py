@@ -5,8 +5,9 @@ import glob
 import_path = 'H:/Olympic history data/final/'
 export_path = 'H:/Olympic history data/'
 
-# Import NOCs
-df = pd.concat(map(pd.read_csv, glob.glob(import_path + '*.csv')))
+# Import NOCs (one file per NOC from run.py, or a folder of partitions per 
+# NOC from coordinator.py)
+df = pd.concat(map(pd.read_csv, glob.glob(import_path + '**/*.csv', recursive=True)))
 
 # Dedupe
 df = df.drop_duplicates()
@@ -0,0 +1,687 @@
+from scrapers import (Scraper, NocScraper)
+import scrapers
+from parsers import (Parser, output_columns, output_date_format)
+from retry import RetryQueue
+from multiprocessing import Process
+from time import (sleep, time)
+from contextlib import contextmanager
+from abc import (ABC, abstractmethod)
+import threading
+import argparse
+import hashlib
+import json
+import os
+import re
+import socket
+import sqlite3
+import pandas as pd
+import dimensions
+
+"""
+Sharded scrape coordinator.
+
+A full scrape is split into shards on a work queue:
+ - 'noc' shards get the Games pages for a NOC,
+ - 'games' shards get the athlete links on one NOC/Games page,
+ - 'athletes' shards get, parse and write the data for a batch of athletes.
+
+Workers claim shards through leases, which they renew while a shard runs,
+so several workers can work through the same scrape, and shards held by a
+worker that died are picked up again once their lease expires. Re-running a
+shard never duplicates the shards it adds. Each 'athletes' shard is written
+to its own file in a folder per NOC, which combine_noc_date.py picks up.
+
+The site rate-limits each client, so each worker paces its own requests
+(--interval). Throughput grows with the number of hosts running workers;
+extra worker processes on one host share that host's rate limit.
+
+Two queues are included:
+ - FileWorkQueue, a directory on a drive shared by every worker host (default),
+ - SqliteWorkQueue, a SQLite file (path ending in .db) for workers on one host 
+   only, as SQLite locking is not reliable on network drives.
+
+Usage:
+    python coordinator.py seed [NOC ...]   queue every NOC (or the ones given)
+    python coordinator.py work [-n N]      run N worker processes until the queue is empty
+    python coordinator.py status           count shards by kind and status
+    python coordinator.py retry            move links missing data to the retry queue
+Each command takes --queue to use a queue other than queue_path.
+"""
+
+# Paths
+queue_path = 'H:/Olympic history data/work_queue/'
+write_path = 'H:/Olympic history data/final/'
+raw_path = 'H:/Olympic history data/raw/'
+retry_path = 'H:/Olympic history data/Missing data/retry_queue.csv'
+
+
+class WorkQueue(ABC):
+    """
+    Parent class for work queues.
+
+    Defines the operations the coordinator needs, as abstract methods so an
+    incomplete subclass fails when it is created. Subclasses store the shards
+    somewhere all workers can reach: FileWorkQueue on a shared drive, or
+    SqliteWorkQueue for workers on one host.
+    A shard is a tuple of (shard_id, kind, noc, payload), where payload is a
+    list of links.
+    """
+
+    @abstractmethod
+    def put(self, kind, noc, payloads):
+        """
+        Add one pending shard per payload.
+
+        Shards are identified by kind, noc and payload, and adding a shard
+        that already exists does nothing. A shard that is run again (after a
+        crash or an expired lease) can therefore add its follow-on shards again
+        without duplicating them.
+
+        :param kind: 'noc', 'games' or 'athletes'
+        :param noc: NOC the shards belong to
+        :param payloads: List of payloads (lists of links)
+        """
+
+    @abstractmethod
+    def claim(self, worker, lease):
+        """
+        Claim the next pending shard, or one whose lease has expired.
+
+        :param worker: Worker id
+        :param lease: Seconds the claim lasts
+        :return: Shard, or None if nothing is available right now
+        """
+
+    @abstractmethod
+    def complete(self, shard_id, worker):
+        """
+        Mark a shard done (only if worker still holds its lease).
+        """
+
+    @abstractmethod
+    def fail(self, shard_id, worker):
+        """
+        Put a shard back to pending, or mark it failed once it has used up its
+        attempts (only if worker still holds its lease).
+        """
+
+    @abstractmethod
+    def renew(self, shard_id, worker, lease):
+        """
+        Extend the lease on a shard that worker is still running.
+
+        :return: Whether worker still held the lease
+        """
+
+    @abstractmethod
+    def put_athletes(self, shard_id, noc, links, batch_size):
+        """
+        Add 'athletes' shards for the athlete links found on a Games page.
+
+        An athlete usually appears on several Games pages, so each link is
+        owned by the first 'games' shard that adds it, and only the links a
+        shard owns go into its athlete shards. Ownership is kept, so when a
+        'games' shard is run again (after a crash or an expired lease) it gets
+        the same links and the same athlete shards, which put ignores if they
+        already exist. No link is lost between recording it and adding its shard.
+
+        :param shard_id: Id of the 'games' shard the links were found by
+        :param noc: NOC the links belong to
+        :param links: List of athlete links
+        :param batch_size: Links per shard
+        :return: Number of links owned by the shard
+        """
+
+    @abstractmethod
+    def add_missing(self, noc, reasons):
+        """
+        Record links missing data.
+
+        :param reasons: Dictionary of link -> failure type
+        """
+
+    @abstractmethod
+    def move_missing(self, handler):
+        """
+        Hand on the links missing data that have not been handed on yet.
+
+        handler is called with a dataframe of the links, their NOC and failure
+        type. The links are then marked as moved, so the next call skips them
+        (a link that is recorded missing again later is handed on again).
+        If handler raises, nothing is marked.
+
+        :param handler: Function taking the dataframe of links
+        :return: Number of links handed on
+        """
+
+    @abstractmethod
+    def active(self):
+        """
+        :return: Number of shards that are pending or claimed
+        """
+
+    @abstractmethod
+    def status(self):
+        """
+        :return: Dataframe with the number of shards by kind and status
+        """
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    Work queue stored in a SQLite database, for worker processes on one host.
+
+    Claims are made in an immediate transaction, so two workers never get the
+    same shard. That relies on SQLite's file locking, which is not reliable
+    over network file systems (SMB, NFS), so keep the database on a local disk
+    and do not share it between hosts. Shards that fail (or whose lease runs
+    out) max_attempts times are marked 'failed'.
+
+    :param path: Path to the database file (created if it does not exist)
+    :param max_attempts: Number of times a shard is tried (defaults to 3)
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None,
+                                          check_same_thread=False)
+        self.lock = threading.RLock()  # the lease renewal thread shares the connection
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT, noc TEXT, payload TEXT,
+                status TEXT DEFAULT 'pending', worker TEXT,
+                lease_expires REAL DEFAULT 0, attempts INTEGER DEFAULT 0);
+            CREATE INDEX IF NOT EXISTS shards_status ON shards (status);
+            CREATE UNIQUE INDEX IF NOT EXISTS shards_key ON shards (kind, noc, payload);
+            CREATE TABLE IF NOT EXISTS links (link TEXT PRIMARY KEY, noc TEXT, shard TEXT);
+            CREATE TABLE IF NOT EXISTS missing (
+                link TEXT PRIMARY KEY, noc TEXT, reason TEXT, moved INTEGER DEFAULT 0);
+            """)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the statements in the block in one immediate transaction.
+
+        The connection is in autocommit mode, so without this every statement
+        commits on its own.
+        """
+
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.connection
+                self.connection.execute('COMMIT')
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def put(self, kind, noc, payloads):
+        with self.transaction() as c:
+            c.executemany('INSERT OR IGNORE INTO shards (kind, noc, payload) VALUES (?, ?, ?)',
+                          [(kind, noc, json.dumps(p)) for p in payloads])
+
+    def claim(self, worker, lease):
+        now = time()
+        with self.transaction() as c:
+            # Leases that ran out on the last attempt
+            c.execute("""UPDATE shards SET status = 'failed'
+                         WHERE status = 'claimed' AND lease_expires < ? AND attempts >= ?""",
+                      (now, self.max_attempts))
+            # Athlete batches first, so output starts flowing early
+            row = c.execute("""SELECT id, kind, noc, payload FROM shards
+                               WHERE status = 'pending'
+                                  OR (status = 'claimed' AND lease_expires < ?)
+                               ORDER BY kind = 'athletes' DESC, id LIMIT 1""",
+                            (now,)).fetchone()
+            if row:
+                c.execute("""UPDATE shards SET status = 'claimed', worker = ?,
+                                lease_expires = ?, attempts = attempts + 1
+                             WHERE id = ?""", (worker, now + lease, row[0]))
+        if row:
+            return row[0], row[1], row[2], json.loads(row[3])
+
+    def complete(self, shard_id, worker):
+        with self.transaction() as c:
+            c.execute("UPDATE shards SET status = 'done' WHERE id = ? AND worker = ?",
+                      (shard_id, worker))
+
+    def fail(self, shard_id, worker):
+        with self.transaction() as c:
+            c.execute(
+                """UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END
+                   WHERE id = ? AND worker = ?""",
+                (self.max_attempts, shard_id, worker))
+
+    def renew(self, shard_id, worker, lease):
+        with self.transaction() as c:
+            cursor = c.execute("""UPDATE shards SET lease_expires = ?
+                                  WHERE id = ? AND worker = ? AND status = 'claimed'""",
+                               (time() + lease, shard_id, worker))
+        return cursor.rowcount == 1
+
+    def put_athletes(self, shard_id, noc, links, batch_size):
+        with self.transaction() as c:
+            c.executemany('INSERT OR IGNORE INTO links (link, noc, shard) VALUES (?, ?, ?)',
+                          [(link, noc, str(shard_id)) for link in links])
+            new = [row[0] for row in c.execute(
+                'SELECT link FROM links WHERE shard = ? ORDER BY link', (str(shard_id),))]
+            c.executemany('INSERT OR IGNORE INTO shards (kind, noc, payload) VALUES (?, ?, ?)',
+                          [('athletes', noc, json.dumps(new[i:i + batch_size]))
+                           for i in range(0, len(new), batch_size)])
+        return len(new)
+
+    def add_missing(self, noc, reasons):
+        with self.transaction() as c:
+            c.executemany('INSERT OR REPLACE INTO missing (link, noc, reason) VALUES (?, ?, ?)',
+                          [(link, noc, reason) for link, reason in reasons.items()])
+
+    def move_missing(self, handler):
+        with self.transaction() as c:
+            missing = pd.read_sql('SELECT link, noc, reason FROM missing WHERE moved = 0', c)
+            if not missing.empty:
+                handler(missing)
+                c.execute('UPDATE missing SET moved = 1 WHERE moved = 0')
+        return missing.shape[0]
+
+    def active(self):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM shards WHERE status IN ('pending', 'claimed')").fetchone()[0]
+
+    def status(self):
+        with self.lock:
+            return pd.read_sql('SELECT kind, status, COUNT(*) AS shards FROM shards GROUP BY kind, status',
+                               self.connection)
+
+
+class FileWorkQueue(WorkQueue):
+    """
+    Work queue stored as files in a directory, e.g. on a shared drive, so
+    workers on several hosts can use the same queue.
+
+    Each shard has a content file (shards/) and an empty marker file whose
+    folder and name give its state:
+     - pending/{id}.{attempts}
+     - claimed/{id}.{attempts}.{worker}.{lease expiry}
+     - done/{id} or failed/{id}
+    Claiming, renewing and finishing a shard are a single rename of its
+    marker. A rename succeeds for only one of the workers trying it, so two
+    workers never get the same shard. New files are created exclusively, so
+    two workers never both create the same shard or own the same link.
+
+    Lease expiry times are compared across hosts, so their clocks must be
+    kept in sync (e.g. with NTP) to within a small part of the lease.
+
+    :param path: Directory for the queue (created if it does not exist)
+    :param max_attempts: Number of times a shard is tried (defaults to 3)
+    """
+
+    folders = ['shards', 'pending', 'claimed', 'done', 'failed', 'links', 'missing', 'moved', 'tmp']
+    states = ['pending', 'claimed', 'done', 'failed']
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        for folder in self.folders:
+            os.makedirs(os.path.join(path, folder), exist_ok=True)
+
+    def file(self, folder, name):
+        return os.path.join(self.path, folder, name)
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:20]
+
+    @staticmethod
+    def worker_name(worker):
+        # Dots separate the fields of a marker name
+        return re.sub('[^A-Za-z0-9-]', '-', worker)
+
+    def create(self, folder, name, text=''):
+        """
+        Create a file only if it does not exist yet.
+
+        :return: Whether the file was created
+        """
+
+        try:
+            with open(self.file(folder, name), 'x', encoding='utf-8') as f:
+                f.write(text)
+            return True
+        except FileExistsError:
+            return False
+
+    def rename(self, source, target):
+        """
+        :return: Whether the rename succeeded (False if another worker got there first)
+        """
+
+        try:
+            os.rename(self.file(*source), self.file(*target))
+            return True
+        except (FileNotFoundError, FileExistsError):
+            return False
+
+    def markers(self, folder, shard_id=None):
+        names = os.listdir(os.path.join(self.path, folder))
+        if shard_id is not None:
+            names = [n for n in names if n.split('.')[0] == shard_id]
+        return names
+
+    def read(self, shard_id):
+        with open(self.file('shards', shard_id + '.json'), encoding='utf-8') as f:
+            shard = json.load(f)
+        return shard_id, shard['kind'], shard['noc'], shard['payload']
+
+    def put(self, kind, noc, payloads):
+        for payload in payloads:
+            shard_id = f"{kind}-{self.key(json.dumps([kind, noc, payload]))}"
+            created = self.create('shards', shard_id + '.json',
+                                  json.dumps({'kind': kind, 'noc': noc, 'payload': payload}))
+            # A shard whose creator died before adding its marker gets one now
+            if created or not any(self.markers(s, shard_id) for s in self.states):
+                self.create('pending', f'{shard_id}.0')
+
+    def claim(self, worker, lease):
+        worker = self.worker_name(worker)
+        expires = int(time() + lease)
+
+        # Athlete batches first, so output starts flowing early
+        pending = sorted(self.markers('pending'), key=lambda n: (not n.startswith('athletes'), n))
+        for name in pending:
+            shard_id, attempts = name.split('.')
+            target = f'{shard_id}.{int(attempts) + 1}.{worker}.{expires}'
+            if self.rename(('pending', name), ('claimed', target)):
+                return self.read(shard_id)
+
+        # Shards whose lease ran out
+        now = time()
+        for name in self.markers('claimed'):
+            shard_id, attempts, _, lease_expires = name.split('.')
+            if int(lease_expires) >= now:
+                continue
+            if int(attempts) >= self.max_attempts:
+                self.rename(('claimed', name), ('failed', shard_id))
+                continue
+            target = f'{shard_id}.{int(attempts) + 1}.{worker}.{expires}'
+            if self.rename(('claimed', name), ('claimed', target)):
+                return self.read(shard_id)
+
+    def held(self, shard_id, worker):
+        """
+        :return: Name of the claimed marker for shard_id if worker holds it, otherwise None
+        """
+
+        worker = self.worker_name(worker)
+        for name in self.markers('claimed', shard_id):
+            if name.split('.')[2] == worker:
+                return name
+
+    def renew(self, shard_id, worker, lease):
+        name = self.held(shard_id, worker)
+        if name is None:
+            return False
+        fields = name.split('.')
+        fields[3] = str(int(time() + lease))
+        return self.rename(('claimed', name), ('claimed', '.'.join(fields)))
+
+    def complete(self, shard_id, worker):
+        name = self.held(shard_id, worker)
+        if name:
+            self.rename(('claimed', name), ('done', shard_id))
+
+    def fail(self, shard_id, worker):
+        name = self.held(shard_id, worker)
+        if name:
+            attempts = name.split('.')[1]
+            if int(attempts) >= self.max_attempts:
+                self.rename(('claimed', name), ('failed', shard_id))
+            else:
+                self.rename(('claimed', name), ('pending', f'{shard_id}.{attempts}'))
+
+    def put_athletes(self, shard_id, noc, links, batch_size):
+        owned = []
+        for link in links:
+            name = self.key(link)
+            if self.create('links', name, shard_id):
+                owned.append(link)
+                continue
+            with open(self.file('links', name), encoding='utf-8') as f:
+                if f.read() == shard_id:
+                    owned.append(link)
+        owned = sorted(owned)
+        self.put('athletes', noc, [owned[i:i + batch_size]
+                                   for i in range(0, len(owned), batch_size)])
+        return len(owned)
+
+    def add_missing(self, noc, reasons):
+        for link, reason in reasons.items():
+            name = self.key(link) + '.json'
+            tmp = self.file('tmp', f'{name}.{os.getpid()}')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'link': link, 'noc': noc, 'reason': reason}, f)
+            os.replace(tmp, self.file('missing', name))
+
+    def move_missing(self, handler):
+        # Not one transaction: if this process dies after handler but before
+        # every file is moved, those links are handed on again next time
+        names = self.markers('missing')
+        if len(names) == 0:
+            return 0
+        records = []
+        for name in names:
+            with open(self.file('missing', name), encoding='utf-8') as f:
+                records.append(json.load(f))
+        handler(pd.DataFrame.from_records(records, columns=['link', 'noc', 'reason']))
+        for name in names:
+            os.replace(self.file('missing', name), self.file('moved', name))
+        return len(names)
+
+    def active(self):
+        return len(self.markers('pending')) + len(self.markers('claimed'))
+
+    def status(self):
+        rows = [(name.split('-')[0], state)
+                for state in self.states for name in self.markers(state)]
+        status = pd.DataFrame(rows, columns=['kind', 'status'])
+        return status.groupby(['kind', 'status']).size().rename('shards').reset_index()
+
+
+def write_partition(df, path):
+    """
+    Write df to csv through a temporary file, so a shard that is redone after
+    its lease ran out never leaves a half-written partition behind.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path + '.tmp', date_format=output_date_format, index=False)
+    os.replace(path + '.tmp', path)
+
+
+class ShardWorker:
+    """
+    Claims shards from a work queue and runs the NocScraper/Parser steps for each.
+
+    :param queue: WorkQueue
+    :param write_path: Directory for the parsed output (one folder per NOC)
+    :param raw_path: Directory for the unparsed output (defaults to None, i.e. not written)
+    :param worker: Worker id (defaults to host name and process id)
+    :param batch_size: Athlete links per 'athletes' shard (defaults to 50)
+    :param lease: Seconds a claim lasts; it is renewed every lease / 3 seconds 
+        while the shard runs (defaults to 600)
+    :param poll: Seconds to wait when no shard is available (defaults to 30)
+    :param request_interval: Minimum seconds between requests from this worker
+        (defaults to 3)
+    """
+
+    def __init__(self, queue, write_path, raw_path=None, worker=None,
+                 batch_size=50, lease=600, poll=30, request_interval=3):
+        scrapers.request_interval = request_interval
+        self.queue = queue
+        self.write_path = write_path
+        self.raw_path = raw_path
+        self.worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = batch_size
+        self.lease = lease
+        self.poll = poll
+
+    @contextmanager
+    def hold_lease(self, shard_id):
+        """
+        Renew the lease on a shard in a background thread while the block runs,
+        so slow shards (e.g. many athlete pages hitting the 60 second retry
+        sleep) are not claimed by a second worker.
+        """
+
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(self.lease / 3):
+                try:
+                    if not self.queue.renew(shard_id, self.worker, self.lease):
+                        print(f'Worker {self.worker} lost the lease on shard {shard_id}')
+                        return
+                except Exception as e:
+                    print(f'Failed to renew the lease on shard {shard_id}')
+                    print(e)
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run_noc(self, shard_id, noc, payload):
+        scraper = NocScraper(noc)
+        scraper.get_games_links()
+        self.queue.put('games', noc, [[link] for link in scraper.games_links])
+
+    def run_games(self, shard_id, noc, payload):
+        scraper = NocScraper(noc)
+        scraper.games_links = payload
+        scraper.get_athlete_links()
+        self.queue.put_athletes(shard_id, noc, scraper.athlete_links, self.batch_size)
+
+    def run_athletes(self, shard_id, noc, payload):
+        scraper = Scraper()
+        scraper.athlete_links = payload
+        scraper.get_athlete_data()
+        if len(scraper.links_missing_data) > 0:
+            self.queue.add_missing(noc, scraper.missing_data_reasons)
+        if len(scraper.athlete_links) == 0:
+            return
+        scraper.join_data()
+        parser = Parser(scraper)
+        parser.parse_results_df()
+        write_partition(parser.parsed_results[output_columns],
+                        f"{self.write_path}{noc}/{shard_id}.csv")
+        if self.raw_path:
+            write_partition(scraper.results_df, f"{self.raw_path}{noc}/{shard_id}.csv")
+
+    def run(self):
+        """
+        Work through shards until the queue has nothing pending or claimed.
+        """
+
+        steps = {'noc': self.run_noc,
+                 'games': self.run_games,
+                 'athletes': self.run_athletes}
+
+        while True:
+            shard = self.queue.claim(self.worker, self.lease)
+            if shard is None:
+                if self.queue.active() == 0:
+                    break
+                sleep(self.poll)
+                continue
+            shard_id, kind, noc, payload = shard
+            print(f'Worker {self.worker} running {kind} shard {shard_id} for NOC = {noc}')
+            try:
+                with self.hold_lease(shard_id):
+                    steps[kind](shard_id, noc, payload)
+                self.queue.complete(shard_id, self.worker)
+            except Exception as e:
+                print(f'Failed on {kind} shard {shard_id} for NOC = {noc}')
+                print(e)
+                self.queue.fail(shard_id, self.worker)
+
+
+def seed(queue, nocs=None):
+    """
+    Add a 'noc' shard for each NOC (defaults to every NOC in d_noc.csv).
+    """
+
+    nocs = nocs or dimensions.nocs()
+    for noc in nocs:
+        queue.put('noc', noc, [[]])
+    print(f'Queued {len(nocs)} NOCs.')
+
+
+def open_queue(path):
+    """
+    :return: SqliteWorkQueue if path ends in .db, otherwise FileWorkQueue
+    """
+
+    if path.endswith('.db'):
+        return SqliteWorkQueue(path)
+    return FileWorkQueue(path)
+
+
+def work(path, write_path, raw_path=None, request_interval=3):
+    """
+    Run a ShardWorker on the queue at path. Target for worker processes.
+    """
+
+    ShardWorker(open_queue(path), write_path, raw_path,
+                request_interval=request_interval).run()
+
+
+def move_missing(queue, retry_queue):
+    """
+    Add the links missing data recorded on the work queue to a RetryQueue.
+    Recovered athletes are merged into {write_path}{noc}.csv next to the NOC's
+    partitions.
+    """
+
+    def add(missing):
+        for noc, links in missing.groupby('noc'):
+            retry_queue.add(noc, dict(zip(links.link, links.reason)))
+
+    n = queue.move_missing(add)
+    print(f'Moved {n} links to the retry queue.')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Sharded scrape coordinator')
+    parser.add_argument('command', choices=['seed', 'work', 'status', 'retry'])
+    parser.add_argument('nocs', nargs='*', help='NOCs to seed (defaults to all)')
+    parser.add_argument('-n', '--workers', type=int, default=1,
+                        help='Number of worker processes on this host (defaults to 1)')
+    parser.add_argument('-q', '--queue', default=queue_path,
+                        help='Queue directory, or SQLite file ending in .db (defaults to queue_path)')
+    parser.add_argument('-i', '--interval', type=float, default=3,
+                        help='Minimum seconds between requests per worker (defaults to 3)')
+    args = parser.parse_args()
+
+    queue = open_queue(args.queue)
+
+    if args.command == 'seed':
+        seed(queue, args.nocs)
+    elif args.command == 'work':
+        workers = [Process(target=work, args=(args.queue, write_path, raw_path, args.interval))
+                   for _ in range(args.workers)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        print(queue.status().to_string(index=False))
+    elif args.command == 'status':
+        print(queue.status().to_string(index=False))
+    elif args.command == 'retry':
+        move_missing(queue, RetryQueue(retry_path))
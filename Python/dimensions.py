@@ -0,0 +1,103 @@
+import os
+import pandas as pd
+
+"""
+Dimension tables from the Data folder, loaded once per process and shared by
+run.py, the parsers and validation.
+
+Tables are read the first time they are needed. Process pools can hand the
+loaded tables to their workers with install (see Parser.parse_results_df), so
+workers never read the files again.
+"""
+
+data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+# Loaded tables and lookups (see load)
+_tables = None
+
+
+def load():
+    """
+    Load the dimension tables in data_path and build lookups from them.
+
+    Only the first call reads the files; later calls return the same dictionary.
+
+    :return: Dictionary with the tables ('games', 'hostcity', 'noc', 'sports')
+        and the lookups ('noc_region', 'host_city', 'sport_season', 'games_set')
+    """
+
+    global _tables
+    if _tables is not None:
+        return _tables
+
+    games = pd.read_csv(os.path.join(data_path, 'd_games.csv'))
+    hostcity = pd.read_csv(os.path.join(data_path, 'd_hostcity.csv'))
+    noc = pd.read_csv(os.path.join(data_path, 'd_noc.csv'))
+    sports = pd.read_csv(os.path.join(data_path, 'd_sports.csv'))
+
+    # (Year, Season) -> City. Games held in more than one city (the 1956
+    # Summer Games in Melbourne and Stockholm) are left out.
+    unique = hostcity.drop_duplicates(['Year', 'Season'], keep=False)
+    host_city = dict(zip(zip(unique.Year, unique.Season), unique.City))
+
+    install({'games': games,
+             'hostcity': hostcity,
+             'noc': noc,
+             'sports': sports,
+             'noc_region': dict(zip(noc.NOC, noc.region1)),
+             'host_city': host_city,
+             'sport_season': dict(zip(sports.Sport, sports.Season)),
+             'games_set': set(zip(games.Year, games.Season))})
+    return _tables
+
+
+def install(tables):
+    """
+    Use tables that were already loaded (e.g. in a parent process) instead of
+    reading the files. Suitable as a process pool initializer.
+
+    :param tables: Dictionary returned by load
+    """
+
+    global _tables
+    _tables = tables
+
+
+def nocs():
+    """
+    :return: List of all NOCs
+    """
+
+    return load()['noc'].NOC.tolist()
+
+
+def noc_region():
+    """
+    :return: Dictionary of NOC -> region
+    """
+
+    return load()['noc_region']
+
+
+def host_city():
+    """
+    :return: Dictionary of (Year, Season) -> host city
+    """
+
+    return load()['host_city']
+
+
+def sport_season():
+    """
+    :return: Dictionary of Sport -> Season
+    """
+
+    return load()['sport_season']
+
+
+def games_set():
+    """
+    :return: Set of (Year, Season) for every Games
+    """
+
+    return load()['games_set']
@@ -1,17 +1,22 @@
 import pandas as pd
 import numpy as np
 import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import dateparser as dp
 from geotext import GeoText as gp
+import dimensions
 
 # Helper functions
 def parse_id(df):
     df.rename(columns={'id':'ID'}, inplace=True)
+    df['ID'] = pd.to_numeric(df.ID).astype('Int32')
     return df
 
 def parse_games(df):
     temp = df.Games.str.split(' ', n = 1, expand = True)
-    df['Year'] = temp[0]
+    df['Year'] = pd.to_numeric(temp[0], errors='coerce').astype('Int16')
     df['Season'] = temp[1]
     # The 'Equestrian' value corresponds to the 1956 Stockholm Games, which 
     # occurred separately from the rest of the Summer Games in Melbourne
@@ -20,13 +25,15 @@ def parse_games(df):
     return df
 
 def parse_age(df):
-    df['Age'] = [None if i == '' else int(i) for i in df['Age']]
+    df['Age'] = pd.to_numeric(df.Age, errors='coerce').astype('Int8')
     return df
 
 def parse_city(df):
-    df.City.replace('MÃ¼nchen', 'Munich', inplace=True)
-    df.City.replace('MontrÃ©al', 'Montreal', inplace=True)
-    df.City.replace('Ciudad de MÃ©xico', 'Mexico City', inplace=True)
+    # Use the host city names from d_hostcity.csv. Needs Year and Season, so
+    # Games must be parsed first. Games held in more than one city keep the
+    # scraped name.
+    games = pd.Series(list(zip(df.Year, df.Season)), index=df.index)
+    df['City'] = games.map(dimensions.host_city()).fillna(df.City)
     return df
 
 def parse_sport(df):
@@ -45,7 +52,7 @@ def parse_rank(df):
     return df
 
 def parse_medal(df):
-    df['Medal'].replace('', np.nan, inplace=True)
+    df['Medal'] = df.Medal.replace('', np.nan)
     return df
 
 def parse_affiliations(df):
@@ -71,7 +78,7 @@ def parse_birth(df):
     split = [s.split(' in ') if s else None for s in df.birth]
     # If no month / day is given, then April 21
     df['BirthDate'] = [dp.parse(s[0]) if s else None for s in split]
-    df['BirthDate'] = [s.date() if s else None for s in df['BirthDate']]
+    df['BirthDate'] = pd.to_datetime([s.date() if s else None for s in df['BirthDate']])
     df['BirthCity'] = [None if s is None else gp(s[1]).cities if len(s) == 2 else None for s in split]
     df['BirthCity'] = [c[0] if c else None for c in df.BirthCity]
     df['BirthCountry'] = [None if s is None else gp(s[1]).countries if len(s) == 2 else None for s in split]
@@ -83,7 +90,7 @@ def parse_death(df):
     split = [s.split(' in ') if s else None for s in df.death]
     # If no month / day is given, then April 21
     df['DeathDate'] = [dp.parse(s[0]) if s else None for s in split]
-    df['DeathDate'] = [s.date() if s else None for s in df['DeathDate']]
+    df['DeathDate'] = pd.to_datetime([s.date() if s else None for s in df['DeathDate']])
     df['DeathCity'] = [None if s is None else gp(s[1]).cities if len(s) == 2 else None for s in split]
     df['DeathCity'] = [c[0] if c else None for c in df.DeathCity]
     df['DeathCountry'] = [None if s is None else gp(s[1]).countries if len(s) == 2 else None for s in split]
@@ -92,7 +99,7 @@ def parse_death(df):
     return df
 
 def parse_height(df):
-    df['Height'] = df.height
+    df['Height'] = pd.to_numeric(df.height, errors='coerce').astype('Int16')
     df.drop(['height'], axis=1, inplace=True)
     return df
 
@@ -106,7 +113,7 @@ def parse_weight(df):
                 weights.append(pd.Series(re.findall('\d+', text)).astype(int).mean())
         else:
             weights.append(np.nan)
-    df['Weight'] = weights
+    df['Weight'] = pd.Series(weights, index=df.index, dtype='float32')
     df.drop(['weight'], axis=1, inplace=True)
     return df
 
@@ -132,7 +139,96 @@ parse_results_dict = {
         'link': parse_link
         }
 
-    
+# Columns (in order) written to the per-NOC output files
+output_columns = ['ID', 'Name', 'Sex', 'Age',
+                  'Height', 'Weight', 'Team', 'NOC',
+                  'Year', 'Season', 'City', 'Sport',
+                  'Event', 'Medal', 'Rank',
+                  'BirthDate', 'BirthCity', 'BirthCountry',
+                  'DeathDate', 'DeathCity', 'DeathCountry',
+                  'affiliations', 'relatives', 'link']
+
+# Format for BirthDate and DeathDate in output files. Pass it to every to_csv,
+# so files written by run.py, retry.py and coordinator.py dedupe against each other.
+output_date_format = '%Y-%m-%d'
+
+# Output dtypes. Fields with a small set of repeated values are categorical,
+# counts and measurements are nullable integers and dates are datetimes.
+results_schema = {
+        'ID': 'Int32',
+        'Name': 'string',
+        'Sex': 'category',
+        'Age': 'Int8',
+        'Height': 'Int16',
+        'Weight': 'float32',
+        'Team': 'category',
+        'NOC': 'category',
+        'Games': 'category',
+        'Year': 'Int16',
+        'Season': pd.CategoricalDtype(['Summer', 'Winter']),
+        'City': 'category',
+        'Sport': 'category',
+        'Event': 'category',
+        'Medal': pd.CategoricalDtype(['Bronze', 'Silver', 'Gold'], ordered=True),
+        'Rank': 'category',
+        'BirthDate': 'datetime64[ns]',
+        'BirthCity': 'category',
+        'BirthCountry': 'category',
+        'DeathDate': 'datetime64[ns]',
+        'DeathCity': 'category',
+        'DeathCountry': 'category',
+        'affiliations': 'category',
+        'relatives': 'string',
+        'link': 'string'
+        }
+
+
+def apply_schema(df, schema=results_schema):
+    """
+    Cast the fields of a parsed results dataframe to their output dtypes.
+
+    Used internally by Parser.parse_results_df, after any chunks have been put 
+    back together (so every chunk shares the same categories).
+
+    :param df: Parsed results dataframe
+    :param schema: Dictionary of field names and dtypes (defaults to results_schema)
+    :return: Dataframe with the fields in schema cast to their dtypes
+    """
+
+    for field in [f for f in schema if f in df.columns]:
+        try:
+            df[field] = df[field].astype(schema[field])
+        except Exception as e:
+            print('Casting failed for field:', field)
+            print(e)
+    return df
+
+
+def parse_chunk(df, parse_dict, fields, verbose=False):
+    """
+    Run the fields of a results dataframe through their parsing functions.
+
+    Used internally by Parser.parse_results_df. This is a module-level function
+    so that chunks of a large dataframe can be parsed in a process pool.
+
+    :param df: Results dataframe (or a chunk of rows from one)
+    :param parse_dict: Dictionary of field names and parsing functions
+    :param fields: Fields to parse, in order
+    :param verbose: Whether to print each field as it is parsed (defaults to False)
+    :return: Parsed dataframe
+    """
+
+    for field in fields:
+        try:
+            df = parse_dict[field](df)
+            if verbose:
+                print(' - Parsed field:', field)
+        except Exception as e:
+            print('Parsing failed for field:', field)
+            print(e)
+    return df
+
+
 class Parser:
     """
     Parent class for parsers. 
@@ -140,18 +236,34 @@ class Parser:
     Parses results_df and events_dfs. Subclasses can add parsing steps.
     
     :param scraper: Scraper with results_df populated. 
+    :param results_df: Results dataframe to parse instead of scraper.results_df, 
+        e.g. the raw results for every NOC combined (defaults to None)
     """
     
-    def __init__(self, scraper):
+    def __init__(self, scraper=None, results_df=None):
         self.scraper = scraper
-        self.results_df = scraper.results_df
-        assert (len(self.scraper.results_df) + len(self.scraper.events_dfs)) > 0
+        if results_df is None:
+            assert (len(self.scraper.results_df) + len(self.scraper.events_dfs)) > 0
+            results_df = scraper.results_df
+        self.results_df = results_df
         self.parsed_results = []
         self.parse_results_dict = parse_results_dict
+        self.results_schema = results_schema
     
-    def parse_results_df(self):
+    def parse_results_df(self, n_jobs=1, chunk_size=5000):
+        """
+        Parse results_df. Results are stored in self.parsed_results, with the
+        dtypes given in self.results_schema.
+        
+        Every parsing function works row by row, so large dataframes can be 
+        split into chunks of rows and parsed in a pool of processes. Chunks 
+        are put back together in their original order.
+        
+        :param n_jobs: Number of processes to use (defaults to 1, None for all cores)
+        :param chunk_size: Rows per chunk when n_jobs is not 1 (defaults to 5000)
+        """
         
-        df = self.results_df
+        df = self.results_df.reset_index(drop=True)
         parse_dict = self.parse_results_dict
         
         # List of fields with validation functions
@@ -172,17 +284,21 @@ class Parser:
     
         # Run fields through the parsing functions
         print(f'Parsing {len(valid_fields)} fields...')
-        for field in valid_fields:
-            try:
-                df = parse_dict[field](df)
-                print(' - Parsed field:', field)
-            except Exception as e:
-                print('Parsing failed for field:', field)
-                print(e)
+        if n_jobs is None:
+            n_jobs = os.cpu_count()
+        if n_jobs == 1 or df.shape[0] <= chunk_size:
+            df = parse_chunk(df, parse_dict, valid_fields, verbose=True)
+        else:
+            chunks = [df.iloc[i:i + chunk_size] for i in range(0, df.shape[0], chunk_size)]
+            print(f'... in {len(chunks)} chunks using {n_jobs} processes.')
+            with ProcessPoolExecutor(max_workers=n_jobs, 
+                                     initializer=dimensions.install,
+                                     initargs=(dimensions.load(),)) as pool:
+                parsed = pool.map(parse_chunk, chunks, 
+                                  repeat(parse_dict), repeat(valid_fields))
+                df = pd.concat(list(parsed))
         
         df.reset_index(drop=True, inplace=True)
-        self.parsed_results = df
+        self.parsed_results = apply_schema(df, self.results_schema)
         
         print(f'Parsed {len(valid_fields)} fields.')
-
-    
\ No newline at end of file
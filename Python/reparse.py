@@ -0,0 +1,32 @@
+from parsers import (Parser, output_columns, output_date_format)
+import pandas as pd
+import glob
+
+"""
+This script re-parses the unparsed results for every NOC (written to the raw
+folder by run.py) in one job, using every core, and writes the combined
+parsed dataset. Use it after changing a parsing function, instead of
+re-running the scrape.
+"""
+
+# Paths
+import_path = 'H:/Olympic history data/raw/'
+export_path = 'H:/Olympic history data/'
+
+if __name__ == '__main__':
+
+    # Import NOCs (one file per NOC from run.py, or a folder of partitions per
+    # NOC from coordinator.py), as text so that missing values are empty 
+    # strings as they are straight after scraping
+    df = pd.concat([pd.read_csv(f, dtype=str, keep_default_na=False)
+                    for f in glob.glob(import_path + '**/*.csv', recursive=True)])
+
+    # Parse
+    parser = Parser(results_df=df)
+    parser.parse_results_df(n_jobs=None)
+
+    # Dedupe
+    df = parser.parsed_results[output_columns].drop_duplicates()
+
+    # Export
+    df.to_csv(export_path + 'final_data.csv', date_format=output_date_format, index=False)
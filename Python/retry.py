@@ -0,0 +1,290 @@
+from scrapers import Scraper
+from parsers import (Parser, output_columns, output_date_format)
+from time import (sleep, time)
+import threading
+import os
+import pandas as pd
+
+"""
+Persistent retry queue for athlete pages that ended up in
+Scraper.links_missing_data, and a background worker that drains it.
+
+Run this file directly to drain an existing queue without scraping anything new.
+"""
+
+# Failure types (see Scraper.get_athlete_page) and how many attempts each gets
+# before the link is given up on. Network errors are usually transient, while
+# a page without a results table rarely grows one.
+max_attempts = {'network': 8,
+                'parse': 3,
+                'missing table': 2}
+
+
+class RetryQueue:
+    """
+    Queue of athlete links that failed, stored as a csv file so it survives
+    between runs.
+
+    Each link keeps its NOC, the type of its last failure, the number of
+    attempts so far, the time of the next attempt and a status
+    ('pending', 'recovered' or 'failed').
+
+    :param path: Path to the queue csv file (created if it does not exist)
+    :param base_delay: Seconds to wait before the first retry (defaults to 600)
+    :param max_delay: Maximum seconds between retries (defaults to 1 day)
+    """
+
+    columns = ['link', 'noc', 'reason', 'attempts', 'next_attempt', 'status']
+
+    def __init__(self, path, base_delay=600, max_delay=86400):
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            self.queue = pd.read_csv(path, keep_default_na=False)
+        else:
+            self.queue = pd.DataFrame(columns=self.columns)
+
+    def save(self):
+        self.queue.to_csv(self.path, columns=self.columns, index=False)
+
+    def add(self, noc, reasons):
+        """
+        Add links missing data to the queue.
+
+        Links that are already pending are left alone. Links that were
+        recovered or given up on before are queued again from scratch, since
+        the NOC output they were merged into may have been rewritten since.
+
+        :param noc: NOC whose output the links belong to
+        :param reasons: Dictionary of link -> failure type 
+            (e.g. Scraper.missing_data_reasons)
+        :return: Number of links added
+        """
+
+        with self.lock:
+            next_attempt = time() + self.base_delay
+            pending = set(self.queue.link[self.queue.status == 'pending'])
+            reasons = {link: r for link, r in reasons.items() if link not in pending}
+            if len(reasons) == 0:
+                return 0
+
+            # Reset links in a finished state
+            done = self.queue.link.isin(reasons.keys())
+            self.queue.loc[done, 'noc'] = noc
+            self.queue.loc[done, 'reason'] = self.queue.link[done].map(reasons)
+            self.queue.loc[done, 'attempts'] = 0
+            self.queue.loc[done, 'next_attempt'] = next_attempt
+            self.queue.loc[done, 'status'] = 'pending'
+
+            new = [link for link in reasons if link not in set(self.queue.link)]
+            rows = pd.DataFrame({'link': new,
+                                 'noc': noc,
+                                 'reason': [reasons[link] for link in new],
+                                 'attempts': 0,
+                                 'next_attempt': next_attempt,
+                                 'status': 'pending'})
+            self.queue = pd.concat([self.queue, rows], ignore_index=True)
+            self.save()
+        return len(reasons)
+
+    def next_due(self, nocs=None):
+        """
+        :param nocs: Only consider links for these NOCs (defaults to None, i.e. all)
+        :return: (link, noc) of the pending link that has been waiting longest, or None
+        """
+
+        with self.lock:
+            due = self.queue[(self.queue.status == 'pending') &
+                             (self.queue.next_attempt.astype(float) <= time())]
+            if nocs is not None:
+                due = due[due.noc.isin(nocs)]
+            if due.empty:
+                return None
+            row = due.sort_values('next_attempt').iloc[0]
+            return row.link, row.noc
+
+    def pending(self):
+        """
+        :return: Number of links still waiting to be retried
+        """
+
+        with self.lock:
+            return int((self.queue.status == 'pending').sum())
+
+    def postpone(self, link):
+        """
+        Try a link again after base_delay, without counting an attempt.
+        Used when the page was fine but its data could not be merged.
+        """
+
+        with self.lock:
+            i = self.queue.index[self.queue.link == link][0]
+            self.queue.at[i, 'next_attempt'] = time() + self.base_delay
+            self.save()
+
+    def record(self, link, reason):
+        """
+        Record the outcome of an attempt.
+
+        Failed links are rescheduled with exponential backoff until they run out
+        of attempts for their failure type.
+
+        :param link: Athlete link
+        :param reason: None if the link was recovered, otherwise the failure type
+        """
+
+        with self.lock:
+            i = self.queue.index[self.queue.link == link][0]
+            attempts = int(self.queue.at[i, 'attempts']) + 1
+            self.queue.at[i, 'attempts'] = attempts
+            if reason is None:
+                self.queue.at[i, 'status'] = 'recovered'
+            else:
+                self.queue.at[i, 'reason'] = reason
+                if attempts >= max_attempts[reason]:
+                    self.queue.at[i, 'status'] = 'failed'
+                else:
+                    delay = min(self.base_delay * 2 ** attempts, self.max_delay)
+                    self.queue.at[i, 'next_attempt'] = time() + delay
+            self.save()
+
+
+def merge_recovered(scraper, noc, write_path, raw_path=None):
+    """
+    Parse data for recovered athletes and merge it into the existing NOC output.
+
+    Rows already in the output for the same athlete links are replaced, so
+    merging the same athlete twice does not duplicate them.
+
+    :param scraper: Scraper with results and info for the recovered athletes
+    :param noc: NOC whose output file the athletes are merged into
+    :param write_path: Directory holding the per-NOC output files
+    :param raw_path: Directory holding the per-NOC unparsed results, which are
+        merged the same way (defaults to None, i.e. not merged)
+    """
+
+    scraper.join_data()
+    if raw_path:
+        merge_csv(scraper.results_df, f"{raw_path}{noc}.csv")
+    parser = Parser(scraper)
+    parser.parse_results_df()
+    recovered = parser.parsed_results
+
+    merge_csv(recovered[output_columns], f"{write_path}{noc}.csv")
+
+
+def merge_csv(df, path):
+    """
+    Write df to a csv file, replacing any rows in the file with the same links.
+
+    The file is read back as text, so dates in df are formatted the same way
+    before the two are put together.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = df.copy()
+    for field in df.select_dtypes('datetime').columns:
+        df[field] = df[field].dt.strftime(output_date_format)
+    if os.path.exists(path):
+        existing = pd.read_csv(path, dtype=str, keep_default_na=False)
+        existing = existing[~existing.link.isin(df.link)]
+        df = pd.concat([existing, df])
+    df.to_csv(path, date_format=output_date_format, index=False)
+
+
+class RetryWorker(threading.Thread):
+    """
+    Background thread that drains a RetryQueue at a low rate.
+
+    Each due link is fetched once (no in-line sleep and retry, the queue's
+    backoff takes care of that). Recovered athletes are merged into the
+    existing output for their NOC straight away.
+
+    While a scrape is running, pass wait_for_nocs=True and call ready(noc) once
+    a NOC's output has been written, so recovered athletes are never merged
+    into a file that the scrape is about to overwrite.
+
+    :param queue: RetryQueue to drain
+    :param write_path: Directory holding the per-NOC output files
+    :param raw_path: Directory holding the per-NOC unparsed results (defaults to None)
+    :param interval: Seconds between requests (defaults to 30)
+    :param wait_for_nocs: Only retry links for NOCs passed to ready (defaults to False)
+    """
+
+    def __init__(self, queue, write_path, raw_path=None, interval=30, wait_for_nocs=False):
+        threading.Thread.__init__(self, daemon=True)
+        self.queue = queue
+        self.write_path = write_path
+        self.raw_path = raw_path
+        self.interval = interval
+        self.nocs = set() if wait_for_nocs else None
+        self.stopping = threading.Event()
+
+    def ready(self, noc):
+        """
+        Allow links for noc to be retried (see wait_for_nocs).
+        """
+
+        # Rebind rather than add in place, so the worker thread never sees
+        # the set change while it is reading it
+        if self.nocs is not None:
+            self.nocs = self.nocs | {noc}
+
+    def retry(self, link, noc):
+        """
+        Retry a single link, merge it into the NOC output if it is recovered
+        and record the outcome in the queue.
+
+        If the page is fine but merging fails (e.g. the output file cannot be
+        written), the link is postponed without using up an attempt.
+        """
+
+        scraper = Scraper()
+        scraper.athlete_links = [link]
+        reason = scraper.get_athlete_page(0, link, retry_wait=None)
+        if reason is None:
+            try:
+                merge_recovered(scraper, noc, self.write_path, self.raw_path)
+            except Exception as e:
+                print('Exception merging recovered athlete: ' + link)
+                print(e)
+                self.queue.postpone(link)
+                return
+        self.queue.record(link, reason)
+
+    def run(self):
+        while not self.stopping.is_set():
+            due = self.queue.next_due(None if self.nocs is None else list(self.nocs))
+            if due:
+                link, noc = due
+                self.retry(link, noc)
+            self.stopping.wait(self.interval)
+
+    def stop(self, drain=False):
+        """
+        Stop the worker.
+
+        :param drain: Keep going until no links are pending (defaults to False)
+        """
+
+        if drain:
+            while self.queue.pending() > 0 and self.is_alive():
+                sleep(self.interval)
+        self.stopping.set()
+        self.join()
+
+
+if __name__ == '__main__':
+
+    retry_path = 'H:/Olympic history data/Missing data/retry_queue.csv'
+    write_path = 'H:/Olympic history data/final/'
+    raw_path = 'H:/Olympic history data/raw/'
+
+    queue = RetryQueue(retry_path)
+    print(f'{queue.pending()} links pending.')
+    worker = RetryWorker(queue, write_path, raw_path)
+    worker.start()
+    worker.stop(drain=True)
+    print(f'Finished! {queue.pending()} links pending.')
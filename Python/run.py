@@ -1,14 +1,28 @@
 from scrapers import NocScraper
-from parsers import Parser
-import pandas as pd
+from parsers import (Parser, output_columns, output_date_format)
+from retry import (RetryQueue, RetryWorker)
+import dimensions
+import os
 
 """
 This script loops over a list of NOCs and writes parsed results to files
-with the name of the noc in the specified directory
+with the name of the noc in the specified directory. Athlete pages that are
+missing data are added to a retry queue, which a background worker drains
+while the loop runs, merging recovered athletes into the NOC files.
 """
 
-nocs = pd.read_csv('H:/Olympic history data/Dimension tables/d_noc.csv')['NOC'].tolist()
+nocs = dimensions.nocs()
 write_path = 'H:/Olympic history data/final/'
+raw_path = 'H:/Olympic history data/raw/'
+retry_path = 'H:/Olympic history data/Missing data/retry_queue.csv'
+
+# The raw folder is newer than the others, so it may not exist yet
+os.makedirs(raw_path, exist_ok=True)
+
+# Start the background worker for the retry queue
+retry_queue = RetryQueue(retry_path)
+retry_worker = RetryWorker(retry_queue, write_path, raw_path, wait_for_nocs=True)
+retry_worker.start()
 
 for noc in nocs:
     
@@ -55,23 +69,26 @@ for noc in nocs:
         
         # Write parsed results to csv in NOC folder
         results_parsed.to_csv(f"{write_path}{noc}.csv", 
-                              columns=['ID', 'Name', 'Sex', 'Age', 
-                                       'Height', 'Weight', 'Team', 'NOC', 
-                                       'Year', 'Season', 'City', 'Sport', 
-                                       'Event', 'Medal', 'Rank',                                     
-                                      'BirthDate', 'BirthCity', 'BirthCountry',
-                                      'DeathDate', 'DeathCity', 'DeathCountry',
-                                      'affiliations','relatives','link'],
+                              columns=output_columns,
+                              date_format=output_date_format,
                               index=False)
         
-        # Write links_missing_data to a text file in Missing_data folder
+        # Write unparsed results to csv in raw folder (see reparse.py)
+        scraper.results_df.to_csv(f"{raw_path}{noc}.csv", index=False)
+        
+        # Add links_missing_data to the retry queue, and let the retry worker
+        # merge into the NOC's files now that they have been written
         if len(scraper.links_missing_data) > 0:
-            with open(f"H:/Olympic history data/Missing data/{noc}_missing.txt", 'w') as f:
-                for link in scraper.links_missing_data:
-                    f.write("%s\n" % link)
+            n = retry_queue.add(noc, scraper.missing_data_reasons)
+            print(f'Added {n} links to the retry queue.')
+        retry_worker.ready(noc)
                     
         print('Finished!')
         
     except: 
         print(f'Failed on NOC {noc}')
 
+# Stop the retry worker; links still pending stay in the queue for next time
+# (run retry.py to drain them)
+retry_worker.stop()
+print(f'{retry_queue.pending()} links pending in the retry queue.')
@@ -2,9 +2,36 @@ from requests import get
 from bs4 import BeautifulSoup
 from time import (sleep, time)
 from tqdm import tqdm
+import threading
 import warnings
 import pandas as pd
-import numpy as np
+
+# Minimum seconds between requests from this process (see get_text). 
+# 0 means no pacing; coordinator workers set it so that each client stays
+# under the site's rate limit.
+request_interval = 0
+_last_request = 0
+_request_lock = threading.Lock()
+
+
+def get_text(url):
+    """
+    Get the text of a page, raising an exception for HTTP error responses
+    (e.g. 429 when rate limited, or 5xx) as well as for connection errors,
+    so error pages are not mistaken for pages that failed to parse.
+
+    Requests are spaced at least request_interval seconds apart.
+    """
+
+    global _last_request
+    with _request_lock:
+        wait = _last_request + request_interval - time()
+        if wait > 0:
+            sleep(wait)
+        _last_request = time()
+    response = get(url)
+    response.raise_for_status()
+    return response.text
 
 
 class Scraper:
@@ -27,6 +54,7 @@ class Scraper:
         self.results_df = [] # infobox + results dataframe
         self.events_dfs = [] # events history dict of dataframes
         self.links_missing_data = [] # links missing results or infobox
+        self.missing_data_reasons = {} # failure type for each missing link
  
     def parse_infobox(self, html_soup, p):
         """
@@ -113,11 +141,81 @@ class Scraper:
                           'relatives': relatives,
                           'link': self.athlete_links[p]})
 
+    def get_athlete_page(self, p, page, retry_wait=60):
+        """
+        Fetch and parse Results table and Infobox from a single athlete page.
+
+        Used internally by self.get_athlete_data and by retry.RetryWorker.
+        One entry is always appended to self.results and self.info, with
+        None standing in for whatever could not be collected.
+
+        :param p: Index of the page in self.athlete_links
+        :param page: Link to the athlete page
+        :param retry_wait: Seconds to sleep before a second attempt after a
+            network error (None to give up after the first attempt)
+        :return: None on success, otherwise the failure type
+            ('network' for connection errors and HTTP error responses,
+            'parse' or 'missing table')
+        """
+
+        # Get and parse html text using Python's built-in HTML parser
+        try:
+            text = get_text(page)
+        # Pause for a minute if there was a problem and try again
+        except Exception as e:
+            print(e)
+            if retry_wait is None:
+                text = None
+            else:
+                print(f'Sleeping for {retry_wait} seconds before trying again.')
+                sleep(retry_wait)
+                print('Trying again...')
+                try:
+                    text = get_text(page)
+                except Exception as e:
+                    print(e)
+                    text = None
+            if text is None:
+                self.results.append(None)
+                self.info.append(None)
+                print('Failed to get page: ' + page)
+                return 'network'
+
+        # Parse HTML
+        html_soup = BeautifulSoup(text, 'html.parser')
+
+        # Parse info box and store in self.info
+        try:
+            self.parse_infobox(html_soup, p)
+        except Exception as e:
+            print('Exception parsing infobox: ' + page)
+            print(e)
+            self.results.append(None)
+            self.info.append(None)
+            return 'parse'
+
+        # Parse results table and store in self.results
+        table = html_soup.find("div", {"id": "div_results"})
+        if not table:
+            self.results.append(None)
+            return 'missing table'
+        try:
+            table_body = [tr.text for tr in table.find('tbody').find_all('tr')]
+            table_body = [row.split('\n')[1:10] for row in table_body]
+            self.results.append(table_body)
+        except Exception as e:
+            print('Exception parsing results table: ' + page)
+            print(e)
+            self.results.append(None)
+            return 'parse'
+
     def get_athlete_data(self):
         """
         Fetch and parse Results table and Infobox from each athlete page.
 
-        :return: Results tables are stored in self.results and Infoboxes in self.info
+        :return: Results tables are stored in self.results and Infoboxes in self.info.
+            Links that failed are stored in self.links_missing_data, and the
+            failure type for each of them in self.missing_data_reasons.
         """
 
         # Checks
@@ -128,55 +226,9 @@ class Scraper:
         start = time()
 
         # Loop over each page in athlete_links
+        reasons = []
         for p, page in enumerate(tqdm(self.athlete_links)):
-
-            # Get and parse html text using Python's built-in HTML parser
-            try:
-                text = get(page).text
-            # Pause for a minute if there was a problem and try again
-            except Exception as e:
-                print(e)
-                print('Sleeping for 60 seconds before trying again.')
-                sleep(60)
-                print('Trying again...')
-                try:
-                    text = get(page).text
-                except Exception as e:
-                    self.results.append(None)
-                    self.info.append(None)
-                    print('Failed to get page: ' + page)
-                    print(e)
-                    continue
-
-            # Parse HTML
-            html_soup = BeautifulSoup(text, 'html.parser')
-            
-
-            # Parse info box and store in self.info
-            try:
-                self.parse_infobox(html_soup, p)
-            except Exception as e:
-                print('Exception parsing infobox: ' + page)
-                print(e)
-                self.info.append(None)
-                continue
-
-            # Parse results table and store in self.results
-            table = html_soup.find("div", {"id": "div_results"})
-            if table:
-                try:
-                    
-                    table_body = [tr.text for tr in table.find('tbody').find_all('tr')]
-                    table_body = [row.split('\n')[1:10] for row in table_body]
-                    self.results.append(table_body)
-                except Exception as e:
-                    print('Exception parsing results table: ' + page)
-                    print(e)
-                    self.results.append(None)
-                    continue
-            else:
-                self.results.append(None)
-            
+            reasons.append(self.get_athlete_page(p, page))
 
         # Checks
         assert len(self.athlete_links) == len(self.results)
@@ -185,14 +237,15 @@ class Scraper:
         # Identify links with missing info or results and remove them
         keep = []
         for i in range(len(self.info)):
-            if self.results[i] == None or self.info[i] == None:
+            if self.results[i] is None or self.info[i] is None:
                 keep.append(False)
                 self.links_missing_data.append(self.athlete_links[i])
+                self.missing_data_reasons[self.athlete_links[i]] = reasons[i]
             else:
                 keep.append(True)
-        self.athlete_links = list(np.array(self.athlete_links)[np.array(keep)])
-        self.results = list(np.array(self.results)[np.array(keep)])
-        self.info = list(np.array(self.info)[np.array(keep)])
+        self.athlete_links = [x for x, k in zip(self.athlete_links, keep) if k]
+        self.results = [x for x, k in zip(self.results, keep) if k]
+        self.info = [x for x, k in zip(self.info, keep) if k]
     
         print(f'Collected data for {len(self.athlete_links)} athletes.')
         if len(self.links_missing_data) > 0:
@@ -292,7 +345,7 @@ class NocScraper(Scraper):
             self.games_links = []
 
         # Get and parse html text using Python's built-in HTML parser
-        text = get(self.entry_url).text
+        text = get_text(self.entry_url)
         html_soup = BeautifulSoup(text, 'html.parser')
 
         # Extract the table body
@@ -345,7 +398,7 @@ class NocScraper(Scraper):
         for page in tqdm(self.games_links):
 
             # Get and parse html text 
-            text = get(page).text
+            text = get_text(page)
             html_soup = BeautifulSoup(text, 'html.parser')
 
             # Extract the table body
@@ -1,14 +1,36 @@
 import pandas as pd
+import dimensions
 
 pd.set_option('display.max_columns', 50)
 pd.set_option('display.max_rows', 500)
 
 
 def validate_year(df):
-    df.Year.isin(pd.read_csv('../Data/d_games.csv', usecols=['Year']))
+    games = pd.Series(list(zip(df.Year, df.Season)), index=df.index)
+    print('Rows with unknown Games:', (~games.isin(dimensions.games_set())).sum())
+    return df
+
+def validate_noc(df):
+    print('Rows with unknown NOC:', (~df.NOC.isin(dimensions.noc_region().keys())).sum())
+    return df
+
+# Winter sports held at Summer Games before the first Winter Games in 1924
+sport_season_exceptions = {(1908, 'Summer', 'Figure Skating'),
+                           (1920, 'Summer', 'Figure Skating'),
+                           (1920, 'Summer', 'Ice Hockey')}
+
+def validate_sport(df):
+    season = df.Sport.map(dimensions.sport_season()).astype(object)
+    print('Rows with unknown Sport:', season.isna().sum())
+    exception = pd.Series(list(zip(df.Year, df.Season, df.Sport)), index=df.index).isin(sport_season_exceptions)
+    print('Rows with Sport in the wrong Season:', 
+          (season.notna() & (season != df.Season.astype(object)) & ~exception).sum())
+    return df
         
 test_dict = {
         'Year': validate_year,
+        'NOC': validate_noc,
+        'Sport': validate_sport,
         }
 
 